@@ -5,9 +5,10 @@ import google.generativeai as genai
 import json
 import os
 
-from config import GEMINI_API_KEY, SQLALCHEMY_DATABASE_URI, CITY_ZONES
+from config import GEMINI_API_KEY, SQLALCHEMY_DATABASE_URI, CITY_ZONES, SIMULATION_MODE
 from models import db, SensorReading, Alert, init_db
-from simulation import start_simulation, get_current_readings, get_city_snapshot
+from simulation import start_simulation, get_current_readings, get_city_snapshot, get_simulation_status
+from scenarios import validate_scenarios, run_scenarios, ScenarioUnavailableError
 from report_generator import generate_sustainability_report
 
 app = Flask(__name__)
@@ -26,7 +27,20 @@ else:
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({'status': 'healthy', 'timestamp': datetime.utcnow().isoformat()})
+    simulation = get_simulation_status()
+    
+    if simulation['stale']:
+        return jsonify({
+            'status': 'degraded',
+            'timestamp': datetime.utcnow().isoformat(),
+            'simulation': simulation
+        }), 503
+    
+    return jsonify({
+        'status': 'healthy',
+        'timestamp': datetime.utcnow().isoformat(),
+        'simulation': simulation
+    })
 
 @app.route('/api/zones', methods=['GET'])
 def get_zones():
@@ -150,6 +164,28 @@ Provide 3-5 specific recommendations for improving sustainability. Keep it under
 def get_snapshot():
     return jsonify(get_city_snapshot())
 
+@app.route('/api/scenarios', methods=['POST'])
+def run_what_if_scenarios():
+    data = request.get_json() or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'request body must be a JSON object'}), 400
+    
+    try:
+        scenarios, ticks, seed = validate_scenarios(
+            data.get('scenarios'),
+            ticks=data.get('ticks', 100),
+            seed=data.get('seed')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        result = run_scenarios(scenarios, ticks, seed)
+    except ScenarioUnavailableError as e:
+        return jsonify({'error': str(e)}), 503
+    
+    return jsonify(result)
+
 @app.route('/api/live', methods=['GET'])
 def get_live_data():
     lat = request.args.get('lat', type=float)
@@ -176,11 +212,15 @@ if __name__ == '__main__':
     with app.app_context():
         db.create_all()
     
-    start_simulation(app)
+    if SIMULATION_MODE == 'embedded':
+        start_simulation(app)
     print('Smart City Digital Twin Backend')
     print('================================')
     print('Server running at http://localhost:5000')
-    print('Sensor simulation active (updates every 3 seconds)')
+    if SIMULATION_MODE == 'embedded':
+        print('Sensor simulation active (updates every 3 seconds)')
+    else:
+        print('Reading sensor state from simulation_worker.py')
     print('🌍 LIVE AQI data from OpenWeatherMap enabled!')
     print('')
     print('Endpoints:')
@@ -190,6 +230,7 @@ if __name__ == '__main__':
     print('  GET  /api/live?lat=&lng=  - Live AQI for location')
     print('  POST /api/ai/analyze      - Gemini AI analysis')
     print('  POST /api/report/generate - Generate PDF report')
+    print('  POST /api/scenarios       - Run what-if scenarios')
     print('')
     
     app.run(debug=True, port=5000, threaded=True)
@@ -3,7 +3,7 @@ import os
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', '')
 OPENWEATHER_API_KEY = os.environ.get('OPENWEATHER_API_KEY', '')
 
-SQLALCHEMY_DATABASE_URI = 'sqlite:///city_data.db'
+SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///city_data.db')
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 
 CITY_ZONES = [
@@ -22,3 +22,23 @@ SENSOR_THRESHOLDS = {
     'electricity': 90,
     'water_usage': 85,
 }
+
+# 'embedded' runs the simulator inside the web process (python app.py).
+# 'external' reads the state published by simulation_worker.py, so any
+# number of web workers can serve the API from one simulation.
+SIMULATION_MODE = os.environ.get('SIMULATION_MODE', 'embedded')
+if SIMULATION_MODE not in ('embedded', 'external'):
+    raise ValueError(f"SIMULATION_MODE must be 'embedded' or 'external', got {SIMULATION_MODE!r}")
+SIMULATION_STATE_FILE = os.environ.get(
+    'SIMULATION_STATE_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'simulation_state.json')
+)
+# Published state older than this (about five ticks) means the worker is down.
+SIMULATION_STALE_SECONDS = 15
+
+SCENARIO_WORKERS = int(os.environ.get('SCENARIO_WORKERS', 4))
+if SCENARIO_WORKERS < 1:
+    raise ValueError(f'SCENARIO_WORKERS must be at least 1, got {SCENARIO_WORKERS}')
+SCENARIO_MAX_COUNT = 50
+SCENARIO_MAX_TICKS = 1000
+SCENARIO_MAX_POINTS = 200
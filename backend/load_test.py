@@ -0,0 +1,123 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def wait_for_server(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    return False
+
+def wait_for_simulation(state_file, timeout=30):
+    # The worker creates the database tables before its first publish, so
+    # waiting here keeps web workers from racing it on startup.
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if os.path.exists(state_file):
+            return True
+        time.sleep(0.2)
+    return False
+
+def run_client(url, duration):
+    session = requests.Session()
+    deadline = time.time() + duration
+    completed = 0
+    errors = 0
+
+    while time.time() < deadline:
+        try:
+            response = session.get(url, timeout=5)
+            if response.status_code == 200:
+                completed += 1
+            else:
+                errors += 1
+        except requests.RequestException:
+            errors += 1
+
+    return completed, errors
+
+def measure(url, duration, clients):
+    # Clients run in separate processes so the load generator itself is not
+    # capped by a single interpreter lock.
+    with ProcessPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(run_client, [url] * clients, [duration] * clients))
+
+    completed = sum(r[0] for r in results)
+    errors = sum(r[1] for r in results)
+    return completed / duration, errors
+
+def start_web_workers(workers, port, env):
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:app'],
+        cwd=BACKEND_DIR,
+        env=env
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure API requests per second versus web worker count.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='web worker counts to test')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent client processes')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per measurement')
+    parser.add_argument('--port', type=int, default=5050)
+    parser.add_argument('--endpoint', default='/api/sensors')
+    args = parser.parse_args()
+
+    # The benchmark gets its own database and state file, so it never adds a
+    # second simulation to a running deployment or fills the dev database.
+    work_dir = tempfile.TemporaryDirectory(prefix='load_test_')
+    state_file = os.path.join(work_dir.name, 'simulation_state.json')
+    env = dict(
+        os.environ,
+        SIMULATION_MODE='external',
+        SIMULATION_STATE_FILE=state_file,
+        DATABASE_URL='sqlite:///' + os.path.join(work_dir.name, 'load_test.db')
+    )
+    base_url = f'http://127.0.0.1:{args.port}'
+
+    simulation = subprocess.Popen([sys.executable, 'simulation_worker.py'], cwd=BACKEND_DIR, env=env)
+    results = []
+
+    try:
+        if not wait_for_simulation(state_file):
+            print('Simulation worker did not publish any state')
+            return
+
+        for workers in args.workers:
+            server = start_web_workers(workers, args.port, env)
+            try:
+                if not wait_for_server(base_url + '/api/health'):
+                    print(f'Server with {workers} worker(s) did not start')
+                    continue
+
+                rps, errors = measure(base_url + args.endpoint, args.duration, args.clients)
+                results.append((workers, rps, errors))
+                print(f'{workers} worker(s): {rps:.1f} req/s ({errors} errors)')
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        simulation.terminate()
+        simulation.wait()
+        work_dir.cleanup()
+
+    print('')
+    print(f'Endpoint: {args.endpoint}, clients: {args.clients}, duration: {args.duration}s')
+    print('Workers | Req/s    | Errors')
+    print('--------|----------|-------')
+    for workers, rps, errors in results:
+        print(f'{workers:<7} | {rps:<8.1f} | {errors}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+import math
+import multiprocessing
+import random
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from config import (
+    CITY_ZONES, SENSOR_THRESHOLDS, SCENARIO_WORKERS, SCENARIO_MAX_COUNT, SCENARIO_MAX_TICKS, SCENARIO_MAX_POINTS
+)
+from simulation import get_live_state, generate_zone_data
+
+class ScenarioUnavailableError(Exception):
+    pass
+
+SCENARIO_METRICS = ['traffic_density', 'air_quality', 'noise_level', 'electricity', 'water_usage']
+
+METRIC_LIMITS = {
+    'traffic_density': (0, 100),
+    'air_quality': (0, 300),
+    'noise_level': (0, 100),
+    'electricity': (0, 100),
+    'water_usage': (0, 100),
+}
+
+# A change in traffic density drags AQI and noise along with it.
+TRAFFIC_COUPLING = {
+    'air_quality': 0.6,
+    'noise_level': 0.3,
+}
+
+scenario_pool = None
+scenario_pool_lock = threading.Lock()
+
+def get_scenario_pool():
+    global scenario_pool
+    
+    # Runs are CPU-bound pure Python, so they need processes to actually run
+    # in parallel. Workers are spawned rather than forked because the web
+    # process has the simulation thread and database connections open.
+    with scenario_pool_lock:
+        if scenario_pool is None:
+            scenario_pool = ProcessPoolExecutor(
+                max_workers=SCENARIO_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+    return scenario_pool
+
+def reset_scenario_pool(pool):
+    global scenario_pool
+    
+    with scenario_pool_lock:
+        if scenario_pool is pool:
+            scenario_pool = None
+    pool.shutdown(wait=False)
+
+def clamp_metric(metric, value):
+    min_val, max_val = METRIC_LIMITS[metric]
+    return max(min_val, min(max_val, value))
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+def fork_state():
+    state = get_live_state()
+    if state['stale']:
+        raise ScenarioUnavailableError(
+            f"simulation state is stale (last published {state['published_at']}), is simulation_worker.py running?"
+        )
+    
+    readings = state['readings']
+    base = {}
+    for zone in CITY_ZONES:
+        zone_id = zone['id']
+        if zone_id not in readings:
+            raise ScenarioUnavailableError(f'no live readings yet for {zone_id}, try again shortly')
+        base[zone_id] = dict(readings[zone_id])
+    return base, state['published_at']
+
+def validate_scenario(scenario):
+    if not isinstance(scenario, dict):
+        raise ValueError('each scenario must be an object')
+    
+    name = scenario.get('name', 'scenario')
+    if not isinstance(name, str):
+        raise ValueError('scenario name must be a string')
+    
+    interventions = scenario.get('interventions', [])
+    if not isinstance(interventions, list):
+        raise ValueError('interventions must be a list')
+    
+    zone_ids = {zone['id'] for zone in CITY_ZONES}
+    cleaned = []
+    for intervention in interventions:
+        if not isinstance(intervention, dict):
+            raise ValueError('each intervention must be an object')
+        zone_id = intervention.get('zone_id')
+        if not isinstance(zone_id, str) or zone_id not in zone_ids:
+            raise ValueError(f'unknown zone_id: {zone_id}')
+        metric = intervention.get('metric')
+        if not isinstance(metric, str) or metric not in METRIC_LIMITS:
+            raise ValueError(f'unknown metric: {metric}')
+        change = intervention.get('change', 0)
+        if not is_number(change):
+            raise ValueError('intervention change must be a finite number')
+        cleaned.append({'zone_id': zone_id, 'metric': metric, 'change': change})
+    
+    return {'name': name, 'interventions': cleaned}
+
+def validate_scenarios(scenarios, ticks=100, seed=None):
+    if not isinstance(scenarios, list) or not scenarios:
+        raise ValueError('scenarios must be a non-empty list')
+    if len(scenarios) > SCENARIO_MAX_COUNT:
+        raise ValueError(f'at most {SCENARIO_MAX_COUNT} scenarios per request')
+    
+    if not isinstance(ticks, int) or isinstance(ticks, bool):
+        raise ValueError('ticks must be an integer')
+    if not 1 <= ticks <= SCENARIO_MAX_TICKS:
+        raise ValueError(f'ticks must be between 1 and {SCENARIO_MAX_TICKS}')
+    
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    elif not isinstance(seed, int) or isinstance(seed, bool):
+        raise ValueError('seed must be an integer')
+    
+    return [validate_scenario(scenario) for scenario in scenarios], ticks, seed
+
+def apply_intervention(state, intervention):
+    zone_id = intervention['zone_id']
+    metric = intervention['metric']
+    change = intervention['change']
+    
+    data = state[zone_id]
+    data[metric] = clamp_metric(metric, data[metric] + change)
+    if metric == 'traffic_density':
+        for coupled_metric, factor in TRAFFIC_COUPLING.items():
+            data[coupled_metric] = clamp_metric(coupled_metric, data[coupled_metric] + change * factor)
+    state[zone_id] = data
+
+def run_scenario(base, scenario, ticks, sample_every, seed):
+    # All scenarios in a batch share a seed, so any difference from the
+    # baseline comes from the interventions rather than random noise.
+    rng = random.Random(seed)
+    state = {zone_id: dict(data) for zone_id, data in base.items()}
+    
+    for intervention in scenario['interventions']:
+        apply_intervention(state, intervention)
+    
+    # Averages and breaches cover every tick, but the returned series is
+    # sampled down to at most SCENARIO_MAX_POINTS values per metric.
+    series = {zone['id']: {metric: [] for metric in SCENARIO_METRICS} for zone in CITY_ZONES}
+    totals = {zone['id']: {metric: 0 for metric in SCENARIO_METRICS} for zone in CITY_ZONES}
+    breaches = {zone['id']: {metric: 0 for metric in SCENARIO_METRICS} for zone in CITY_ZONES}
+    
+    for tick in range(ticks):
+        sampled = (tick + 1) % sample_every == 0 or tick == ticks - 1
+        for zone in CITY_ZONES:
+            zone_id = zone['id']
+            state[zone_id] = generate_zone_data(zone_id, state[zone_id], rng=rng)
+            for metric in SCENARIO_METRICS:
+                value = state[zone_id][metric]
+                totals[zone_id][metric] += value
+                if sampled:
+                    series[zone_id][metric].append(round(value, 2))
+                if value > SENSOR_THRESHOLDS[metric]:
+                    breaches[zone_id][metric] += 1
+    
+    zones = []
+    for zone in CITY_ZONES:
+        zone_id = zone['id']
+        zones.append({
+            'zone_id': zone_id,
+            'zone_name': zone['name'],
+            'series': series[zone_id],
+            'average': {
+                metric: total / ticks
+                for metric, total in totals[zone_id].items()
+            },
+            'threshold_breaches': breaches[zone_id],
+        })
+    
+    return {
+        'name': scenario['name'],
+        'interventions': scenario['interventions'],
+        'zones': zones,
+    }
+
+def run_scenarios(scenarios, ticks, seed):
+    # Expects the output of validate_scenarios.
+    forked_at = datetime.utcnow().isoformat()
+    base, published_at = fork_state()
+    sample_every = math.ceil(ticks / SCENARIO_MAX_POINTS)
+    runs = [{'name': 'baseline', 'interventions': []}] + scenarios
+    
+    # A pool whose child died (e.g. OOM-killed) stays broken, so replace it
+    # and retry once before giving up.
+    for _ in range(2):
+        pool = get_scenario_pool()
+        try:
+            futures = [pool.submit(run_scenario, base, run, ticks, sample_every, seed) for run in runs]
+            results = [future.result() for future in futures]
+            break
+        except BrokenProcessPool:
+            reset_scenario_pool(pool)
+    else:
+        raise ScenarioUnavailableError('scenario worker pool failed, try again')
+    
+    return {
+        'forked_at': forked_at,
+        'published_at': published_at,
+        'ticks': ticks,
+        'sample_every': sample_every,
+        'seed': seed,
+        'baseline': results[0],
+        'scenarios': results[1:],
+    }
@@ -1,16 +1,19 @@
+import json
+import os
 import random
 import threading
 import time
 from datetime import datetime
 from models import db, SensorReading, Alert
-from config import CITY_ZONES, SENSOR_THRESHOLDS
+from config import CITY_ZONES, SENSOR_THRESHOLDS, SIMULATION_MODE, SIMULATION_STATE_FILE, SIMULATION_STALE_SECONDS
 
 current_readings = {}
 live_aqi_cache = {}
 last_aqi_fetch = {}
+published_state = {'mtime': None, 'published_at': None, 'readings': {}}
 
-def generate_sensor_value(base, variance, min_val=0, max_val=100):
-    value = base + random.uniform(-variance, variance)
+def generate_sensor_value(base, variance, min_val=0, max_val=100, rng=random):
+    value = base + rng.uniform(-variance, variance)
     return max(min_val, min(max_val, value))
 
 def fetch_live_aqi_for_zone(zone):
@@ -39,7 +42,7 @@ def fetch_live_aqi_for_zone(zone):
     
     return None
 
-def generate_zone_data(zone_id, previous=None, zone_info=None):
+def generate_zone_data(zone_id, previous=None, zone_info=None, rng=random):
     live_data = None
     if zone_info:
         live_data = fetch_live_aqi_for_zone(zone_info)
@@ -47,11 +50,11 @@ def generate_zone_data(zone_id, previous=None, zone_info=None):
     if previous:
         base_data = {
             'zone_id': zone_id,
-            'traffic_density': generate_sensor_value(previous['traffic_density'], 10),
-            'air_quality': generate_sensor_value(previous['air_quality'], 15, 0, 300),
-            'noise_level': generate_sensor_value(previous['noise_level'], 8),
-            'electricity': generate_sensor_value(previous['electricity'], 12),
-            'water_usage': generate_sensor_value(previous['water_usage'], 10),
+            'traffic_density': generate_sensor_value(previous['traffic_density'], 10, rng=rng),
+            'air_quality': generate_sensor_value(previous['air_quality'], 15, 0, 300, rng=rng),
+            'noise_level': generate_sensor_value(previous['noise_level'], 8, rng=rng),
+            'electricity': generate_sensor_value(previous['electricity'], 12, rng=rng),
+            'water_usage': generate_sensor_value(previous['water_usage'], 10, rng=rng),
         }
     else:
         zone_profiles = {
@@ -66,11 +69,11 @@ def generate_zone_data(zone_id, previous=None, zone_info=None):
         profile = zone_profiles.get(zone_id, zone_profiles['zone_a'])
         base_data = {
             'zone_id': zone_id,
-            'traffic_density': generate_sensor_value(profile['traffic'], 15),
-            'air_quality': generate_sensor_value(profile['aqi'], 20, 0, 300),
-            'noise_level': generate_sensor_value(profile['noise'], 10),
-            'electricity': generate_sensor_value(profile['elec'], 15),
-            'water_usage': generate_sensor_value(profile['water'], 12),
+            'traffic_density': generate_sensor_value(profile['traffic'], 15, rng=rng),
+            'air_quality': generate_sensor_value(profile['aqi'], 20, 0, 300, rng=rng),
+            'noise_level': generate_sensor_value(profile['noise'], 10, rng=rng),
+            'electricity': generate_sensor_value(profile['elec'], 15, rng=rng),
+            'water_usage': generate_sensor_value(profile['water'], 12, rng=rng),
         }
     
     if live_data and live_data.get('aqi'):
@@ -140,7 +143,75 @@ def save_reading(app, zone_data):
         db.session.add(reading)
         db.session.commit()
 
-def simulation_loop(app):
+def publish_state():
+    state = {
+        'published_at': datetime.utcnow().isoformat(),
+        'readings': current_readings,
+    }
+    tmp_path = f'{SIMULATION_STATE_FILE}.{os.getpid()}.tmp'
+    
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, SIMULATION_STATE_FILE)
+    except OSError as e:
+        print(f"Error publishing simulation state: {e}")
+
+def load_published_state():
+    global published_state
+    
+    try:
+        mtime = os.stat(SIMULATION_STATE_FILE).st_mtime_ns
+    except OSError:
+        return published_state
+    
+    if mtime != published_state['mtime']:
+        try:
+            with open(SIMULATION_STATE_FILE) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return published_state
+        
+        published_state = {
+            'mtime': mtime,
+            'published_at': data.get('published_at'),
+            'readings': data.get('readings', {}),
+        }
+    
+    return published_state
+
+def is_stale(published_at):
+    try:
+        age = (datetime.utcnow() - datetime.fromisoformat(published_at)).total_seconds()
+    except (TypeError, ValueError):
+        return True
+    return age > SIMULATION_STALE_SECONDS
+
+def get_live_state():
+    # In external mode the readings are only as fresh as the worker's last
+    # publish, so callers get that time rather than the current one.
+    if SIMULATION_MODE == 'external':
+        state = load_published_state()
+        return {
+            'readings': state['readings'],
+            'published_at': state['published_at'],
+            'stale': is_stale(state['published_at']),
+        }
+    return {
+        'readings': current_readings,
+        'published_at': datetime.utcnow().isoformat(),
+        'stale': False,
+    }
+
+def get_simulation_status():
+    status = {'mode': SIMULATION_MODE, 'stale': False}
+    if SIMULATION_MODE == 'external':
+        state = get_live_state()
+        status['published_at'] = state['published_at']
+        status['stale'] = state['stale']
+    return status
+
+def simulation_loop(app, publish=False):
     global current_readings
     
     for zone in CITY_ZONES:
@@ -153,6 +224,9 @@ def simulation_loop(app):
             save_reading(app, current_readings[zone_id])
             check_thresholds_and_create_alerts(app, current_readings[zone_id], zone)
         
+        if publish:
+            publish_state()
+        
         time.sleep(3)
 
 def start_simulation(app):
@@ -161,17 +235,18 @@ def start_simulation(app):
     return thread
 
 def get_current_readings():
-    global current_readings
+    state = get_live_state()
+    readings = state['readings']
     result = []
     for zone in CITY_ZONES:
         zone_id = zone['id']
-        if zone_id in current_readings:
-            data = current_readings[zone_id].copy()
+        if zone_id in readings:
+            data = readings[zone_id].copy()
             data['zone_name'] = zone['name']
             data['color'] = zone['color']
             data['lat'] = zone['lat']
             data['lng'] = zone['lng']
-            data['timestamp'] = datetime.utcnow().isoformat()
+            data['timestamp'] = state['published_at']
             result.append(data)
     return result
 
@@ -0,0 +1,25 @@
+import os
+from flask import Flask
+
+from config import SQLALCHEMY_DATABASE_URI, SIMULATION_STATE_FILE
+from models import init_db
+from simulation import simulation_loop
+
+def create_worker_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = SQLALCHEMY_DATABASE_URI
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    init_db(app)
+    return app
+
+if __name__ == '__main__':
+    os.makedirs(os.path.dirname(SIMULATION_STATE_FILE), exist_ok=True)
+    app = create_worker_app()
+    
+    print('Smart City Digital Twin Simulation Worker')
+    print('=========================================')
+    print(f'Publishing sensor state to {SIMULATION_STATE_FILE}')
+    print('Start web workers with SIMULATION_MODE=external')
+    print('')
+    
+    simulation_loop(app, publish=True)